@@ -2,6 +2,7 @@
 Configuration management for MECE Audience Segmentation System
 """
 import os
+from functools import lru_cache
 from typing import Dict, Any
 from dotenv import load_dotenv
 
@@ -35,8 +36,9 @@ class Config:
     API_BASE_URL = os.getenv('API_BASE_URL', '')
     
     @classmethod
+    @lru_cache(maxsize=1)
     def get_segmentation_config(cls) -> Dict[str, Any]:
-        """Get configuration for segmentation parameters"""
+        """Get configuration for segmentation parameters (cached; treat as read-only)"""
         return {
             'min_segment_size': cls.MIN_SEGMENT_SIZE,
             'max_segment_size': cls.MAX_SEGMENT_SIZE,
@@ -56,8 +58,9 @@ class Config:
         }
     
     @classmethod
+    @lru_cache(maxsize=1)
     def validate_config(cls) -> bool:
-        """Validate configuration parameters"""
+        """Validate configuration parameters (cached after the first successful call)"""
         errors = []
         
         if cls.MIN_SEGMENT_SIZE <= 0:
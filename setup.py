@@ -1,6 +1,7 @@
 # Quick Demo Script for MECE Segmentation
 # Run this for a faster demo with fewer users
 
+import logging
 import sys
 import os
 
@@ -36,4 +37,5 @@ def run_quick_demo():
     print("Check the generated CSV and JSON files for detailed results.")
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
     run_quick_demo()
\ No newline at end of file
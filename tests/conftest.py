@@ -0,0 +1,35 @@
+"""
+Shared pytest configuration for the MECE Segmentation System tests
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+# Reference time for date-dependent pipeline stages, so their outputs do not drift between runs
+FIXED_NOW = pd.Timestamp("2025-01-15 12:00:00")
+
+@pytest.fixture(scope="module")
+def rng():
+    """Seeded random generator, fresh for each test module so generated data does not depend on test order"""
+    return np.random.default_rng(42)
+
+@pytest.fixture(scope="session")
+def now():
+    """Fixed current time passed to the pipeline stages"""
+    return FIXED_NOW
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--runslow", action="store_true", default=False, help="run tests marked as slow"
+    )
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: end-to-end test, skipped unless --runslow is given")
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--runslow"):
+        return
+    skip_slow = pytest.mark.skip(reason="needs --runslow option to run")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip_slow)
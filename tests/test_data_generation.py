@@ -1,16 +1,9 @@
 """
 Tests for data generation functionality
 """
-import pytest
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-import sys
-import os
-
-# Add parent directory to path for imports
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
 from app import MECESegmentationSystem
 
 class TestDataGeneration:
@@ -56,7 +49,7 @@ class TestDataGeneration:
         
         # Sessions should be non-negative integers
         assert all(df['sessions_last_30d'] >= 0)
-        assert df['sessions_last_30d'].dtype == 'int64'
+        assert df['sessions_last_30d'].dtype == 'int16'
         
         # Engagement and profitability scores should be 0-1
         assert all(df['engagement_score'] >= 0)
@@ -66,7 +59,7 @@ class TestDataGeneration:
         
         # Cart items should be positive integers
         assert all(df['num_cart_items'] > 0)
-        assert df['num_cart_items'].dtype == 'int64'
+        assert df['num_cart_items'].dtype == 'int16'
     
     def test_data_correlation(self):
         """Test that data shows expected correlations"""
@@ -99,6 +92,3 @@ class TestDataGeneration:
             df = self.system.generate_mock_data(n_users=n_users)
             assert len(df) == n_users
             assert df['user_id'].nunique() == n_users
-
-if __name__ == "__main__":
-    pytest.main([__file__])
@@ -4,25 +4,99 @@ Tests for MECE Segmentation System
 import pytest
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-import sys
-import os
-
-# Add parent directory to path for imports
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
 from app import MECESegmentationSystem
 from config import config
 
+# Kept small for speed. With seed 42, 700 is the smallest multiple of 50 users that leaves
+# four decision tree segments above the 100-user minimum (plus Other_Bucket),
+# so the size and scoring checks cover several segments. The checks hold for any
+# size, because check_size_constraints does not apply the minimum to Other_Bucket.
+SMALL_N = 700
+
+# Pipeline stages are computed once per module and shared by the tests below.
+# Later stages mutate their input in place, so each fixture works on a copy.
+# Tests receive the shared frames by reference and must not modify them; copy
+# a frame first when a test needs to rerun a stage on it.
+
+@pytest.fixture(scope="module")
+def system():
+    """Segmentation system shared by the pipeline fixtures and test classes"""
+    return MECESegmentationSystem(
+        min_segment_size=100,  # Smaller for testing
+        max_segment_size=5000
+    )
+
+@pytest.fixture(scope="module")
+def raw_df(system, rng, now):
+    """Generated mock dataset"""
+    return system.generate_mock_data(n_users=SMALL_N, now=now, rng=rng)
+
+@pytest.fixture(scope="module")
+def universe(system, raw_df, now):
+    """Universe of recent cart abandoners"""
+    return system.define_universe(raw_df, now=now)
+
+@pytest.fixture(scope="module")
+def segmented(system, universe, now):
+    """Universe with MECE segments assigned"""
+    return system.create_mece_segments(universe.copy(), now=now)
+
+@pytest.fixture(scope="module")
+def constrained(system, segmented):
+    """Segmented universe with size constraints applied"""
+    return system.apply_size_constraints(segmented.copy())
+
+@pytest.fixture(scope="module")
+def scores(system, constrained):
+    """Segment scores for the constrained universe"""
+    return system.calculate_segment_scores(constrained)
+
+# Stage invariants, checked by TestMECESegmentationSystem.test_stage_invariants
+
+REQUIRED_SCORE_COLUMNS = {
+    'segment_name', 'size', 'conversion_potential',
+    'lift_vs_control', 'overall_score'
+}
+
+def check_mece_segmentation(system, segmented_df):
+    """MECE segmentation logic"""
+    assert 'segment' in segmented_df.columns
+    assert isinstance(segmented_df['segment'].dtype, pd.CategoricalDtype)
+    
+    # One hash pass over the segment column: groupby drops missing segments, so
+    # the group sizes only add up to the row count if every user has exactly one
+    # segment, and every group must be a known decision tree segment
+    sizes = segmented_df.groupby('segment', observed=True, sort=False).size()
+    assert sizes.sum() == len(segmented_df)
+    assert set(sizes.index) <= set(system._SEGMENT_LABELS)
+
+def check_size_constraints(system, constrained_df):
+    """Size constraint application"""
+    # Check that no decision tree segment is below minimum size. Other_Bucket is
+    # exempt: it only collects the merged small segments, so it can itself end up
+    # below the minimum (e.g. 850-1300 test users, or 449 users at the defaults)
+    sizes = constrained_df.groupby('segment', sort=False, observed=True).size()
+    assert (sizes.drop('Other_Bucket', errors='ignore') >= system.min_segment_size).all()
+
+def check_segment_scoring(system, scores_df):
+    """Segment scoring calculation"""
+    # Check required columns
+    missing_columns = REQUIRED_SCORE_COLUMNS - set(scores_df.columns)
+    assert not missing_columns
+    
+    # Check score ranges
+    assert (scores_df['conversion_potential'] >= 0).all()
+    assert (scores_df['conversion_potential'] <= 1).all()
+    assert (scores_df['overall_score'] >= 0).all()
+
 class TestMECESegmentationSystem:
     """Test cases for MECE Segmentation System"""
     
-    def setup_method(self):
-        """Set up test fixtures"""
-        self.system = MECESegmentationSystem(
-            min_segment_size=100,  # Smaller for testing
-            max_segment_size=5000
-        )
+    @pytest.fixture(autouse=True, scope="class")
+    @classmethod
+    def bind_system(cls, system):
+        """Share the pipeline fixtures' system (tests only call compute methods)"""
+        cls.system = system
     
     def test_initialization(self):
         """Test system initialization"""
@@ -30,102 +104,132 @@ class TestMECESegmentationSystem:
         assert self.system.max_segment_size == 5000
         assert len(self.system.segments_data) == 0
     
-    def test_mock_data_generation(self):
+    def test_mock_data_generation(self, raw_df):
         """Test mock data generation"""
-        df = self.system.generate_mock_data(n_users=1000)
+        df = raw_df
         
         # Check basic structure
-        assert len(df) == 1000
+        assert len(df) == SMALL_N
         assert 'user_id' in df.columns
         assert 'cart_abandoned_date' in df.columns
         assert 'avg_order_value' in df.columns
         assert 'engagement_score' in df.columns
         
         # Check data types
-        assert df['user_id'].dtype == 'object'
-        assert df['avg_order_value'].dtype == 'float64'
-        assert df['engagement_score'].dtype == 'float64'
+        assert pd.api.types.is_string_dtype(df['user_id'])  # object or string[pyarrow]
+        assert df['avg_order_value'].dtype == 'float32'
+        assert df['engagement_score'].dtype == 'float32'
+        assert df['cart_abandoned_date'].dtype == 'datetime64[ns]'
         
         # Check value ranges
         assert df['engagement_score'].min() >= 0
         assert df['engagement_score'].max() <= 1
         assert df['avg_order_value'].min() > 0
     
-    def test_universe_definition(self):
+    def test_universe_definition(self, raw_df, universe, now):
         """Test universe definition logic"""
-        df = self.system.generate_mock_data(n_users=1000)
-        universe = self.system.define_universe(df)
+        df = raw_df
         
         # Check that universe only contains recent cart abandoners
-        cutoff_date = datetime.now() - timedelta(days=7)
-        assert all(universe['cart_abandoned_date'] >= cutoff_date)
+        cutoff_date = now - pd.Timedelta(days=7)
+        assert (universe['cart_abandoned_date'] >= cutoff_date).all()
         assert len(universe) <= len(df)
     
-    def test_recency_score_calculation(self):
+    def test_recency_score_calculation(self, raw_df, now):
         """Test recency score calculation"""
-        df = self.system.generate_mock_data(n_users=100)
-        recency_scores = self.system.calculate_recency_score(df)
+        recency_scores = self.system.calculate_recency_score(raw_df, now=now)
         
         # Check score range
-        assert all(recency_scores >= 0)
-        assert all(recency_scores <= 1)
+        assert (recency_scores >= 0).all()
+        assert (recency_scores <= 1).all()
         
         # Check that more recent dates get higher scores
-        recent_date = datetime.now() - timedelta(days=1)
-        old_date = datetime.now() - timedelta(days=6)
+        recent_date = now - pd.Timedelta(days=1)
+        old_date = now - pd.Timedelta(days=6)
         
         recent_df = pd.DataFrame({'cart_abandoned_date': [recent_date, old_date]})
-        recent_scores = self.system.calculate_recency_score(recent_df)
-        
-        assert recent_scores.iloc[0] > recent_scores.iloc[1]
-    
-    def test_mece_segmentation(self):
-        """Test MECE segmentation logic"""
-        df = self.system.generate_mock_data(n_users=1000)
-        universe = self.system.define_universe(df)
-        segmented_df = self.system.create_mece_segments(universe)
-        
-        # Check that all users are segmented
-        assert 'segment' in segmented_df.columns
-        assert segmented_df['segment'].notna().all()
-        
-        # Check that segments are mutually exclusive and collectively exhaustive
-        total_users = len(segmented_df)
-        segmented_users = segmented_df['segment'].notna().sum()
-        assert total_users == segmented_users
-    
-    def test_size_constraints(self):
-        """Test size constraint application"""
-        df = self.system.generate_mock_data(n_users=1000)
-        universe = self.system.define_universe(df)
-        segmented_df = self.system.create_mece_segments(universe)
-        constrained_df = self.system.apply_size_constraints(segmented_df)
-        
-        # Check that no segments are below minimum size
-        segment_counts = constrained_df['segment'].value_counts()
-        assert all(segment_counts >= self.system.min_segment_size)
-    
-    def test_segment_scoring(self):
-        """Test segment scoring calculation"""
-        df = self.system.generate_mock_data(n_users=1000)
-        universe = self.system.define_universe(df)
-        segmented_df = self.system.create_mece_segments(universe)
-        constrained_df = self.system.apply_size_constraints(segmented_df)
-        scores_df = self.system.calculate_segment_scores(constrained_df)
-        
-        # Check required columns
-        required_columns = [
-            'segment_name', 'size', 'conversion_potential', 
-            'lift_vs_control', 'overall_score'
-        ]
-        for col in required_columns:
-            assert col in scores_df.columns
-        
-        # Check score ranges
-        assert all(scores_df['conversion_potential'] >= 0)
-        assert all(scores_df['conversion_potential'] <= 1)
-        assert all(scores_df['overall_score'] >= 0)
+        recent_scores = self.system.calculate_recency_score(recent_df, now=now)
+        
+        recent_values = recent_scores.to_numpy()
+        assert recent_values[0] > recent_values[1]
+    
+    def test_recency_score_missing_date(self, now):
+        """Test that a missing abandonment date gets a missing recency score"""
+        df = pd.DataFrame({'cart_abandoned_date': [now - pd.Timedelta(days=2), pd.NaT]})
+        recency_scores = self.system.calculate_recency_score(df, now=now)
+        
+        assert recency_scores.iloc[0] == pytest.approx(1 - 2 / 7)
+        assert np.isnan(recency_scores.iloc[1])
+    
+    def test_numba_segments_match_numpy(self, universe, now):
+        """Test that the opt-in Numba decision tree assigns the same segments as np.select"""
+        pytest.importorskip("numba")
+        
+        numba_segments = self.system.create_mece_segments(universe.copy(), now=now, use_numba=True)['segment']
+        numpy_segments = self.system.create_mece_segments(universe.copy(), now=now)['segment']
+        
+        pd.testing.assert_series_equal(numba_segments, numpy_segments)
+    
+    def test_mece_validation_rejects_unsegmented(self):
+        """Test that users without a segment fail MECE validation"""
+        df = pd.DataFrame({'segment': ['Premium_Engaged', None]})
+        
+        with pytest.raises(ValueError, match="Not Collectively Exhaustive"):
+            self.system._validate_mece(df)
+    
+    def test_size_constraints_accept_object_segments(self):
+        """Test that a plain string segment column (e.g. reloaded from CSV) is constrained"""
+        system = MECESegmentationSystem(min_segment_size=2, max_segment_size=5000)
+        df = pd.DataFrame({'segment': ['Premium_Engaged'] * 3 + ['Custom']})
+        
+        constrained_df = system.apply_size_constraints(df)
+        
+        assert constrained_df['segment'].tolist() == ['Premium_Engaged'] * 3 + ['Other_Bucket']
+    
+    def test_segment_decision_tree_boundaries(self, now):
+        """Test one user per decision tree branch, with values on each threshold"""
+        # 21 users, so the 50th and 80th AOV percentiles fall exactly on the users at $20 and $26
+        users = [
+            # avg_order_value, engagement_score, profitability_score, sessions_last_30d, expected segment
+            (30, 0.8, 0.5, 1, 'Premium_Engaged'),
+            (29, 0.7, 0.8, 1, 'Premium_Profitable'),
+            (28, 0.7, 0.7, 1, 'Premium_Other'),
+            (27, 0.4, 0.5, 20, 'Premium_Other'),
+            (26, 0.8, 0.8, 1, 'Mid_Value_Champions'),  # AOV on the high cut-off stays mid value
+            (25, 0.8, 0.8, 1, 'Mid_Value_Champions'),
+            (24, 0.8, 0.7, 1, 'Mid_Value_Engaged'),
+            (23, 0.7, 0.8, 1, 'Mid_Value_Engaged'),
+            (22, 0.4, 0.5, 11, 'Mid_Value_Active'),
+            (21, 0.4, 0.5, 10, 'Mid_Value_Other'),
+            (20, 0.8, 0.5, 1, 'Low_Value_High_Engagement'),  # AOV on the median stays low value
+            (19, 0.7, 0.5, 6, 'Low_Value_Moderate_Engaged'),
+            (18, 0.5, 0.5, 5, 'Low_Value_Other'),
+            (17, 0.4, 0.5, 20, 'Low_Value_Other'),
+        ] + [(aov, 0.3, 0.5, 1, 'Low_Value_Other') for aov in range(10, 17)]
+        aov, engagement, profitability, sessions, expected = zip(*users)
+        df = pd.DataFrame({
+            'avg_order_value': np.array(aov, dtype='float32'),
+            'engagement_score': np.array(engagement, dtype='float32'),
+            'profitability_score': np.array(profitability, dtype='float32'),
+            'sessions_last_30d': np.array(sessions, dtype='int16'),
+            'cart_abandoned_date': now,
+        })
+        assert np.percentile(df['avg_order_value'], [50, 80]).tolist() == [20, 26]
     
+        segmented_df = self.system.create_mece_segments(df, now=now)
+    
+        assert segmented_df['segment'].tolist() == list(expected)
+    
+    @pytest.mark.parametrize("stage, check", [
+        ("segmented", check_mece_segmentation),
+        ("constrained", check_size_constraints),
+        ("scores", check_segment_scoring),
+    ])
+    def test_stage_invariants(self, stage, check, request):
+        """Test the invariants of each pipeline stage"""
+        check(self.system, request.getfixturevalue(stage))
+    
+    @pytest.mark.slow
     def test_complete_analysis(self):
         """Test complete analysis workflow"""
         segmented_data, segment_strategy = self.system.run_complete_analysis(n_users=1000)
@@ -143,23 +247,38 @@ class TestMECESegmentationSystem:
         total_in_segments = segment_strategy['size'].sum()
         assert total_users == total_in_segments
 
+    def test_export_results(self, scores, tmp_path):
+        """Test exporting the segment summary to CSV and JSON"""
+        segment_strategy = scores
+        csv_file, json_file = self.system.export_results(
+            segment_strategy, str(tmp_path / "mece_segments")
+        )
+        
+        # Both files must round-trip to the summary, whatever optional packages are installed
+        pd.testing.assert_frame_equal(pd.read_csv(csv_file), segment_strategy)
+        pd.testing.assert_frame_equal(pd.read_json(json_file, orient='records'), segment_strategy)
+        
+        with open(json_file, encoding='utf-8') as f:
+            assert f.read().isascii()  # Non-ASCII rule text such as '≤' is escaped
+
 class TestConfig:
     """Test configuration management"""
     
     def test_config_validation(self):
         """Test configuration validation"""
         # This should not raise an exception
-        config.validate_config()
+        assert config.validate_config() is True
+        
+        # Repeated calls are served from the cache
+        assert config.validate_config() is True
     
     def test_get_segmentation_config(self):
         """Test getting segmentation configuration"""
         seg_config = config.get_segmentation_config()
         
-        assert 'min_segment_size' in seg_config
-        assert 'max_segment_size' in seg_config
-        assert 'engagement_high_threshold' in seg_config
+        assert {'min_segment_size', 'max_segment_size', 'engagement_high_threshold'}.issubset(seg_config)
         assert isinstance(seg_config['min_segment_size'], int)
         assert isinstance(seg_config['engagement_high_threshold'], float)
-
-if __name__ == "__main__":
-    pytest.main([__file__])
+        
+        # Repeated calls return the cached dictionary
+        assert config.get_segmentation_config() is seg_config